@@ -4,6 +4,7 @@ Ensures all data (caches, vector store, scraped content) persists across app res
 """
 
 import os
+import gzip
 import json
 import logging
 import time
@@ -12,8 +13,28 @@ from datetime import datetime
 import streamlit as st
 from pathlib import Path
 
+# Try to import ciso8601 for fast ISO timestamp parsing
+try:
+    import ciso8601
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+# Try to import orjson for fast JSON serialization
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+def _dumps_bytes(obj: Any) -> bytes:
+    """Serialize an object to compact JSON bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
 class DataPersistenceManager:
     """
     Manages persistent storage and loading of all chatbot data.
@@ -46,10 +67,11 @@ class DataPersistenceManager:
             logger.warning(f"Could not load app state: {e}")
         
         # Default state
+        now_iso = datetime.now().isoformat()
         return {
             'app_version': '1.0.0',
-            'first_startup': datetime.now().isoformat(),
-            'last_startup': datetime.now().isoformat(),
+            'first_startup': now_iso,
+            'last_startup': now_iso,
             'total_sessions': 0,
             'total_queries': 0,
             'data_sources_loaded': False,
@@ -57,13 +79,17 @@ class DataPersistenceManager:
             'performance_monitoring_enabled': True
         }
     
-    def save_app_state(self, updates: Dict[str, Any] = None):
-        """Save application state to disk."""
+    def save_app_state(self, updates: Dict[str, Any] = None, now_iso: Optional[str] = None):
+        """Save application state to disk.
+        
+        Callers stamping several fields at once can pass ``now_iso`` so the
+        same timestamp is reused instead of formatting a new one.
+        """
         try:
             if updates:
                 self.app_state.update(updates)
             
-            self.app_state['last_startup'] = datetime.now().isoformat()
+            self.app_state['last_startup'] = now_iso or datetime.now().isoformat()
             
             with open(self.app_state_file, 'w', encoding='utf-8') as f:
                 json.dump(self.app_state, f, indent=2, ensure_ascii=False)
@@ -141,11 +167,12 @@ class DataPersistenceManager:
             status['load_time'] = time.time() - start_time
             
             # Update app state
+            now_iso = datetime.now().isoformat()
             self.save_app_state({
                 'data_sources_loaded': status['data_sources'],
                 'cache_initialized': status['caches'],
-                'last_data_check': datetime.now().isoformat()
-            })
+                'last_data_check': now_iso
+            }, now_iso=now_iso)
             
             logger.info(f"Data preload completed in {status['load_time']:.2f}s")
             
@@ -206,15 +233,14 @@ class DataPersistenceManager:
     def cleanup_old_data(self, days_old: int = 30):
         """Clean up old data files and cache entries."""
         try:
-            current_time = datetime.now()
+            cutoff_mtime = time.time() - days_old * 86400
             cleaned_files = []
             
             # Clean up old log files, temp files, etc.
             for file_pattern in ['*.log', '*.tmp', '*_backup_*']:
                 for file_path in self.data_dir.glob(file_pattern):
                     if file_path.is_file():
-                        file_age = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        if (current_time - file_age).days > days_old:
+                        if file_path.stat().st_mtime < cutoff_mtime:
                             file_path.unlink()
                             cleaned_files.append(str(file_path))
             
@@ -228,18 +254,23 @@ class DataPersistenceManager:
             return []
     
     def export_data_backup(self) -> str:
-        """Export all data as a backup file."""
+        """
+        Export all data as a gzip-compressed backup file.
+        Top-level sections are serialized and written one at a time so the
+        full backup document is never held in memory.
+        """
         try:
-            backup_data = {
-                'timestamp': datetime.now().isoformat(),
-                'app_state': self.app_state,
-                'data_status': self.get_data_status()
-            }
-            
-            backup_file = self.data_dir / f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            now = datetime.now()
+            backup_file = self.data_dir / f"backup_{now.strftime('%Y%m%d_%H%M%S')}.json.gz"
             
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, indent=2, ensure_ascii=False)
+            with gzip.open(backup_file, 'wb', compresslevel=3) as f:
+                f.write(b'{"timestamp":')
+                f.write(_dumps_bytes(now.isoformat()))
+                f.write(b',"app_state":')
+                f.write(_dumps_bytes(self.app_state))
+                f.write(b',"data_status":')
+                f.write(_dumps_bytes(self.get_data_status()))
+                f.write(b'}')
             
             logger.info(f"Data backup created: {backup_file}")
             return str(backup_file)
@@ -297,7 +328,10 @@ def display_data_status_dashboard():
             last_startup = app_state.get('last_startup', 'unknown')
             if last_startup != 'unknown':
                 try:
-                    startup_time = datetime.fromisoformat(last_startup)
+                    if CISO8601_AVAILABLE:
+                        startup_time = ciso8601.parse_datetime(last_startup)
+                    else:
+                        startup_time = datetime.fromisoformat(last_startup)
                     st.write(f"**Last Startup**: {startup_time.strftime('%Y-%m-%d %H:%M')}")
                 except:
                     st.write(f"**Last Startup**: {last_startup}")
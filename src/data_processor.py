@@ -3,6 +3,7 @@ Data processor for extracting and processing GitLab Handbook and Direction pages
 """
 
 import os
+import argparse
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
@@ -18,19 +19,30 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default crawl settings used by the command-line entry point
+DEFAULT_BASE_URLS = [
+    "https://about.gitlab.com/handbook/",
+    "https://about.gitlab.com/direction/"
+]
+DEFAULT_MAX_PAGES = 50
+DEFAULT_RATE_LIMIT = 1.0
+
 class WebDataProcessor:
     """Processes web pages from any website for chatbot training."""
     
-    def __init__(self, base_urls: List[str], max_pages: int = 100):
+    def __init__(self, base_urls: List[str], max_pages: int = 100,
+                 rate_limit: float = DEFAULT_RATE_LIMIT):
         """
         Initialize the data processor.
         
         Args:
             base_urls: List of base URLs to scrape
             max_pages: Maximum number of pages to process
+            rate_limit: Seconds to wait between page requests
         """
         self.base_urls = base_urls
         self.max_pages = max_pages
+        self.rate_limit = rate_limit
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -180,7 +192,8 @@ class WebDataProcessor:
                 urls_to_process.extend(new_links[:10])  # Limit new links per page
             
             # Rate limiting
-            time.sleep(1)
+            if self.rate_limit > 0:
+                time.sleep(self.rate_limit)
         
         logger.info(f"Processed {len(self.documents)} documents")
         return self.documents
@@ -200,28 +213,23 @@ class WebDataProcessor:
                 chunk['total_chunks'] = 1
                 chunks.append(chunk)
             else:
-                # Split into chunks
-                num_chunks = 0
-                for i in range(0, len(words), chunk_size - overlap):
-                    chunk_words = words[i:i + chunk_size]
-                    chunk_content = ' '.join(chunk_words)
-                    
-                    chunk = {
+                # Split into chunks; the chunk count is known up front from
+                # the window starts, so every chunk is built complete
+                starts = range(0, len(words), chunk_size - overlap)
+                total_chunks = len(starts)
+                chunks.extend(
+                    {
                         'url': doc['url'],
                         'title': doc['title'],
-                        'content': chunk_content,
+                        'content': ' '.join(words[i:i + chunk_size]),
                         'headings': doc['headings'],
-                        'word_count': len(chunk_words),
-                        'chunk_id': num_chunks,
-                        'total_chunks': -1,  # Will update after processing
+                        'word_count': min(chunk_size, len(words) - i),
+                        'chunk_id': chunk_id,
+                        'total_chunks': total_chunks,
                         'scraped_at': doc['scraped_at']
                     }
-                    chunks.append(chunk)
-                    num_chunks += 1
-                
-                # Update total chunks count
-                for chunk in chunks[-num_chunks:]:
-                    chunk['total_chunks'] = num_chunks
+                    for chunk_id, i in enumerate(starts)
+                )
         
         return chunks
     
@@ -245,19 +253,28 @@ class WebDataProcessor:
         logger.info(f"Saved {len(self.documents)} documents and {len(chunks)} chunks to {output_dir}/")
         return chunks
 
-def main():
+def main(base_urls: Optional[List[str]] = None, max_pages: int = DEFAULT_MAX_PAGES,
+         output_dir: str = "data", rate_limit: float = DEFAULT_RATE_LIMIT) -> List[Dict]:
     """Main function to run the data processor."""
-    base_urls = [
-        "https://about.gitlab.com/handbook/",
-        "https://about.gitlab.com/direction/"
-    ]
-    
-    processor = GitLabDataProcessor(base_urls, max_pages=50)
+    processor = WebDataProcessor(base_urls or DEFAULT_BASE_URLS, max_pages=max_pages,
+                                 rate_limit=rate_limit)
     documents = processor.process_all_pages()
-    chunks = processor.save_data()
+    chunks = processor.save_data(output_dir)
     
     print(f"✅ Successfully processed {len(documents)} documents")
     print(f"✅ Created {len(chunks)} chunks for training")
+    return chunks
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments for the data processor."""
+    parser = argparse.ArgumentParser(description="Scrape and chunk web pages for the chatbot.")
+    parser.add_argument("urls", nargs="*", help="Base URLs to crawl (defaults to the GitLab Handbook and Direction pages)")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES, help="Maximum number of pages to process")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE_LIMIT, help="Seconds to wait between page requests")
+    parser.add_argument("--output-dir", default="data", help="Directory to write documents and chunks to")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(args.urls or None, max_pages=args.max_pages, output_dir=args.output_dir,
+         rate_limit=args.rate_limit)
@@ -6,13 +6,16 @@ Implements query routing, rewriting, and reranking for production-grade performa
 
 import os
 import re
+import sys
+import hashlib
 import json
 import time
 import logging
 from typing import List, Dict, Optional, Tuple, Any, Set
-from dataclasses import dataclass
-from collections import Counter
-import math
+from dataclasses import dataclass, replace
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 # NLP and search imports
 try:
@@ -22,9 +25,66 @@ try:
 except ImportError:
     print("Warning: Vector search libraries not available")
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:
+    print("Warning: scikit-learn not available, keyword search disabled")
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Patterns compiled once at import time
+_TERM_PATTERN = r"(?u)\b\w[\w-]{1,49}\b"  # 2-50 word chars, hyphenated terms kept whole
+_WS_RE = re.compile(r'\s+')
+_STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'to', 'of', 'in', 'on', 'at',
+    'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through',
+    'during', 'before', 'after', 'above', 'below', 'up', 'down', 'out',
+    'off', 'over', 'under', 'again', 'further', 'then', 'once'
+})
+# Matches whole words of 3+ characters, skipping stop words via a negative lookahead
+_KEYWORD_RE = re.compile(
+    r'\b(?!(?:' + '|'.join(map(re.escape, sorted(_STOP_WORDS, key=len, reverse=True))) + r')\b)\w{3,}\b'
+)
+
+# Per-search dataclasses drop their instance __dict__ where supported (Python 3.10+)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Content terms that earn the query-type boost during reranking
+_QUERY_TYPE_TERMS = {
+    'definition': ('define',),
+    'process': ('step', 'process', 'how')
+}
+
+def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, best first, without sorting the whole array."""
+    if top_k < scores.size:
+        top_idx = np.argpartition(-scores, top_k)[:top_k]
+    else:
+        top_idx = np.arange(scores.size)
+    return top_idx[np.argsort(-scores[top_idx], kind='stable')]
+
+def _content_id(content: str) -> int:
+    """Stable 64-bit identifier for content that cannot be mapped to a corpus index."""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_intdigest(content)
+    return int.from_bytes(hashlib.blake2b(content.encode('utf-8'), digest_size=8).digest(), 'big')
+
+@dataclass(**_DATACLASS_SLOTS)
 class SearchResult:
     """Enhanced search result with scoring and metadata."""
     content: str
@@ -36,7 +96,7 @@ class SearchResult:
     chunk_id: str
     metadata: Dict[str, Any]
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class QueryAnalysis:
     """Analysis of user query for optimization."""
     original_query: str
@@ -53,70 +113,129 @@ class KeywordSearchEngine:
     Provides exact term matching and phrase detection.
     """
     
-    def __init__(self, documents: List[Dict]):
+    def __init__(self, documents: List[Dict], index_path: Optional[str] = None):
+        """
+        Initialize the keyword index.
+        
+        Args:
+            documents: Corpus documents; list positions are the returned document ids
+            index_path: Optional file to persist the fitted index to and reload it from
+        """
         self.documents = documents
-        self.doc_vectors = {}
-        self.vocabulary = set()
-        self.idf_scores = {}
-        self._build_index()
+        self.index_path = index_path
+        self.vectorizer = None
+        self.postings = None
+        self._analyzer = None
+        self._vocabulary = {}
+        self._idf = None
+        
+        if not self._load_index():
+            self._build_index()
+            self._save_index()
     
     def _build_index(self):
-        """Build TF-IDF index for keyword search."""
+        """Build the sparse TF-IDF postings (one row per document) for keyword search."""
         try:
-            # Build vocabulary and document frequency
-            doc_freq = Counter()
-            all_terms = []
-            
-            for i, doc in enumerate(self.documents):
-                content = doc.get('content', '').lower()
-                terms = self._extract_terms(content)
-                all_terms.append(terms)
-                
-                # Count unique terms per document
-                unique_terms = set(terms)
-                for term in unique_terms:
-                    doc_freq[term] += 1
-                self.vocabulary.update(unique_terms)
-            
-            # Calculate IDF scores
-            total_docs = len(self.documents)
-            for term in self.vocabulary:
-                self.idf_scores[term] = math.log(total_docs / (doc_freq[term] + 1))
-            
-            # Build TF-IDF vectors for each document
-            for i, terms in enumerate(all_terms):
-                self.doc_vectors[i] = self._calculate_tf_idf(terms)
-                
-            logger.info(f"Built keyword index with {len(self.vocabulary)} terms")
+            self.vectorizer = TfidfVectorizer(
+                lowercase=True,
+                token_pattern=_TERM_PATTERN,
+                stop_words=None,
+                norm='l2',
+                dtype=np.float32
+            )
+            # Documents are tokenized straight from a generator into the sparse
+            # matrix; the vectorizer L2-normalizes rows so scoring is a dot product.
+            # Only the column-major (CSC) form is kept: each term's column lists
+            # the documents containing it, and the row-major matrix is released.
+            self.postings = self.vectorizer.fit_transform(
+                doc.get('content', '') for doc in self.documents
+            ).tocsc()
+            
+            self._cache_query_state()
+            
+            logger.info(f"Built keyword index with {len(self.vectorizer.vocabulary_)} terms")
             
         except Exception as e:
             logger.error(f"Error building keyword index: {e}")
-            self.doc_vectors = {}
-            self.vocabulary = set()
+            self.vectorizer = None
+            self.postings = None
+            self._analyzer = None
+            self._vocabulary = {}
+            self._idf = None
     
-    def _extract_terms(self, text: str) -> List[str]:
-        """Extract searchable terms from text."""
-        # Remove special characters and split
-        text = re.sub(r'[^\w\s-]', ' ', text.lower())
-        terms = text.split()
-        
-        # Filter terms (remove very short/long terms)
-        terms = [term for term in terms if 2 <= len(term) <= 50]
+    def _cache_query_state(self):
+        """Cache the tokenizer, term->column map and IDF weights used to vectorize queries."""
+        # The vectorizer would otherwise rebuild its analyzer on every query
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._vocabulary = self.vectorizer.vocabulary_
+        self._idf = self.vectorizer.idf_.astype(np.float32)
+    
+    def _corpus_hash(self) -> str:
+        """Fingerprint of the corpus content and order, used to validate a persisted index."""
+        digest = hashlib.blake2b(digest_size=16)
+        for doc in self.documents:
+            digest.update(doc.get('url', '').encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(doc.get('content', '').encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def _hash_path(self) -> str:
+        """Sidecar file holding the corpus hash of the persisted index."""
+        return f"{self.index_path}.hash"
+    
+    def _load_index(self) -> bool:
+        """Load a persisted index if it was built from the same corpus."""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return False
         
-        return terms
+        try:
+            with open(self._hash_path(), 'r', encoding='utf-8') as f:
+                if f.read().strip() != self._corpus_hash():
+                    logger.info("Persisted keyword index is stale, rebuilding")
+                    return False
+            
+            # Memory-map the index arrays so worker processes share pages
+            index = joblib.load(self.index_path, mmap_mode='r')
+            self.vectorizer = index['vectorizer']
+            self.postings = index['postings']
+            self._cache_query_state()
+            
+            logger.info(f"Loaded keyword index with {len(self._vocabulary)} terms from {self.index_path}")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Could not load keyword index: {e}")
+            return False
     
-    def _calculate_tf_idf(self, terms: List[str]) -> Dict[str, float]:
-        """Calculate TF-IDF vector for a document."""
-        term_freq = Counter(terms)
-        total_terms = len(terms)
+    def _save_index(self):
+        """Persist the fitted index and its corpus hash."""
+        if not self.index_path or self.postings is None:
+            return
         
-        tf_idf = {}
-        for term, freq in term_freq.items():
-            tf = freq / total_terms
-            idf = self.idf_scores.get(term, 0)
-            tf_idf[term] = tf * idf
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+            joblib.dump({'vectorizer': self.vectorizer, 'postings': self.postings},
+                         self.index_path, compress=0)
+            with open(self._hash_path(), 'w', encoding='utf-8') as f:
+                f.write(self._corpus_hash())
+            
+        except Exception as e:
+            logger.warning(f"Could not save keyword index: {e}")
+    
+    def _query_terms(self, query: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return (term columns, L2-normalized TF-IDF weights) for a query, or None if no term is indexed."""
+        term_counts = Counter(
+            self._vocabulary[term] for term in self._analyzer(query) if term in self._vocabulary
+        )
+        if not term_counts:
+            return None
         
-        return tf_idf
+        cols = np.fromiter(term_counts.keys(), dtype=np.int64, count=len(term_counts))
+        weights = np.fromiter(term_counts.values(), dtype=np.float32, count=len(term_counts))
+        weights *= self._idf[cols]
+        weights /= np.linalg.norm(weights)
+        return cols, weights
     
     def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
         """
@@ -124,40 +243,30 @@ class KeywordSearchEngine:
         Returns list of (document_index, score) tuples.
         """
         try:
-            query_terms = self._extract_terms(query.lower())
-            if not query_terms:
+            if self.postings is None or top_k <= 0:
+                return []
+            
+            query_terms = self._query_terms(query)
+            if query_terms is None:
                 return []
+            cols, weights = query_terms
             
-            query_vector = self._calculate_tf_idf(query_terms)
+            # Accumulate cosine scores term-at-a-time from the postings of the
+            # query terms only; documents sharing no term are never touched
+            indptr, indices, data = self.postings.indptr, self.postings.indices, self.postings.data
+            scores = np.zeros(self.postings.shape[0], dtype=np.float32)
+            for col, weight in zip(cols, weights):
+                start, end = indptr[col], indptr[col + 1]
+                scores[indices[start:end]] += weight * data[start:end]
             
-            # Calculate similarity scores
-            scores = []
-            for doc_id, doc_vector in self.doc_vectors.items():
-                score = self._cosine_similarity(query_vector, doc_vector)
-                if score > 0:
-                    scores.append((doc_id, score))
+            candidates = np.flatnonzero(scores)
+            sims = scores[candidates]
             
-            # Sort by score and return top results
-            scores.sort(key=lambda x: x[1], reverse=True)
-            return scores[:top_k]
+            return [(int(candidates[i]), float(sims[i])) for i in _top_k_indices(sims, top_k)]
             
         except Exception as e:
             logger.error(f"Error in keyword search: {e}")
             return []
-    
-    def _cosine_similarity(self, vec1: Dict[str, float], vec2: Dict[str, float]) -> float:
-        """Calculate cosine similarity between two TF-IDF vectors."""
-        intersection = set(vec1.keys()) & set(vec2.keys())
-        if not intersection:
-            return 0.0
-        
-        numerator = sum(vec1[term] * vec2[term] for term in intersection)
-        
-        sum1 = sum(val**2 for val in vec1.values())
-        sum2 = sum(val**2 for val in vec2.values())
-        denominator = math.sqrt(sum1) * math.sqrt(sum2)
-        
-        return numerator / denominator if denominator > 0 else 0.0
 
 class QueryOptimizer:
     """
@@ -176,15 +285,40 @@ class QueryOptimizer:
             'results': ['outcomes', 'achievements', 'deliverables']
         }
         
+        # Inverted index: main term or synonym -> synonyms of its (first) main term
+        self._synonym_index: Dict[str, Tuple[str, ...]] = {}
+        for main_term, synonyms in self.gitlab_terms.items():
+            synonyms = tuple(synonyms)
+            self._synonym_index.setdefault(main_term, synonyms)
+            for synonym in synonyms:
+                self._synonym_index.setdefault(synonym, synonyms)
+        
         self.query_patterns = {
-            'definition': r'\b(what is|define|meaning|definition)\b',
-            'process': r'\b(how to|process|procedure|steps|workflow)\b',
-            'comparison': r'\b(compare|difference|versus|vs|better)\b',
-            'list': r'\b(list|examples|types|kinds|categories)\b'
+            'definition': re.compile(r'\b(what is|define|meaning|definition)\b'),
+            'process': re.compile(r'\b(how to|process|procedure|steps|workflow)\b'),
+            'comparison': re.compile(r'\b(compare|difference|versus|vs|better)\b'),
+            'list': re.compile(r'\b(list|examples|types|kinds|categories)\b')
         }
+        
+        # Bounded LRU of analyses keyed by the raw query text
+        self._analysis_cache: OrderedDict = OrderedDict()
+        self._analysis_cache_size = 512
     
     def analyze_query(self, query: str) -> QueryAnalysis:
-        """Analyze and optimize user query."""
+        """Analyze and optimize user query, reusing the analysis of repeated queries."""
+        cached = self._analysis_cache.get(query)
+        if cached is not None:
+            self._analysis_cache.move_to_end(query)
+            return cached
+        
+        analysis = self._analyze_query(query)
+        self._analysis_cache[query] = analysis
+        if len(self._analysis_cache) > self._analysis_cache_size:
+            self._analysis_cache.popitem(last=False)
+        return analysis
+    
+    def _analyze_query(self, query: str) -> QueryAnalysis:
+        """Run the full query analysis."""
         try:
             cleaned_query = self._clean_query(query)
             keywords = self._extract_keywords(cleaned_query)
@@ -219,7 +353,7 @@ class QueryOptimizer:
     def _clean_query(self, query: str) -> str:
         """Clean and normalize query text."""
         # Remove extra whitespace and normalize
-        query = re.sub(r'\s+', ' ', query.strip())
+        query = _WS_RE.sub(' ', query.strip())
         
         # Convert to lowercase for processing (preserve original case for display)
         return query
@@ -227,15 +361,8 @@ class QueryOptimizer:
     def _extract_keywords(self, query: str) -> List[str]:
         """Extract important keywords from query."""
         # Simple keyword extraction - can be enhanced with NLP
-        stop_words = {'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-                     'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-                     'should', 'may', 'might', 'must', 'can', 'to', 'of', 'in', 'on', 'at',
-                     'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through',
-                     'during', 'before', 'after', 'above', 'below', 'up', 'down', 'out',
-                     'off', 'over', 'under', 'again', 'further', 'then', 'once'}
-        
-        words = re.findall(r'\b\w+\b', query.lower())
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        # One regex pass yields words of 3+ characters that are not stop words
+        keywords = _KEYWORD_RE.findall(query.lower())
         
         return keywords
     
@@ -259,7 +386,7 @@ class QueryOptimizer:
         query_lower = query.lower()
         
         for query_type, pattern in self.query_patterns.items():
-            if re.search(pattern, query_lower):
+            if pattern.search(query_lower):
                 return query_type
         
         return 'factual'  # Default type
@@ -271,14 +398,12 @@ class QueryOptimizer:
         
         # Add synonym-based expansions
         for keyword in keywords:
-            for main_term, synonyms in self.gitlab_terms.items():
-                if keyword in synonyms or keyword == main_term:
-                    # Add alternative phrasings
-                    for synonym in synonyms:
-                        if synonym not in query_lower:
-                            expanded = query + " " + synonym
-                            expansions.append(expanded)
-                    break
+            synonyms = self._synonym_index.get(keyword)
+            if synonyms:
+                # Add alternative phrasings
+                for synonym in synonyms:
+                    if synonym not in query_lower:
+                        expansions.append(f"{query} {synonym}")
         
         # Add context-specific expansions
         if 'gitlab' not in query_lower:
@@ -292,12 +417,25 @@ class HybridSearchEngine:
     Implements reranking and query optimization for optimal results.
     """
     
-    def __init__(self, vector_store, documents: List[Dict]):
+    def __init__(self, vector_store, documents: List[Dict],
+                 keyword_index_path: Optional[str] = None):
         self.vector_store = vector_store
         self.documents = documents
-        self.keyword_engine = KeywordSearchEngine(documents)
+        # Persisting the keyword index is opt-in, e.g. keyword_index_path="data/keyword_index.joblib"
+        self.keyword_engine = KeywordSearchEngine(documents, index_path=keyword_index_path)
         self.query_optimizer = QueryOptimizer()
         
+        # Map (url, chunk_id) to corpus position so semantic hits share keyword result ids
+        self._doc_index = {
+            (doc.get('url', ''), doc.get('chunk_id', 0)): i for i, doc in enumerate(documents)
+        }
+        
+        # Lowercased corpus contents (self.documents[i]['content']) by document id, filled on first use
+        self._lower_contents: Dict[int, str] = {}
+        
+        # Semantic and keyword retrieval are independent, so they run concurrently
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid-search")
+        
         # Search weights (can be tuned based on performance)
         self.semantic_weight = 0.7
         self.keyword_weight = 0.3
@@ -308,8 +446,13 @@ class HybridSearchEngine:
             'semantic_searches': 0,
             'keyword_searches': 0,
             'hybrid_searches': 0,
+            'cache_hits': 0,
             'avg_response_time': 0.0
         }
+        
+        # Bounded LRU of final results keyed by (query, top_k, mode, weights)
+        self._result_cache: OrderedDict = OrderedDict()
+        self._result_cache_size = 256
     
     def search(self, query: str, top_k: int = 5, use_hybrid: bool = True) -> List[SearchResult]:
         """
@@ -318,6 +461,14 @@ class HybridSearchEngine:
         start_time = time.time()
         self.search_stats['total_searches'] += 1
         
+        cache_key = (query.strip().lower(), top_k, use_hybrid, self.semantic_weight, self.keyword_weight)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            self.search_stats['cache_hits'] += 1
+            self._update_avg_response_time(time.time() - start_time)
+            return self._copy_results(cached)
+        
         try:
             # Analyze query for optimization
             query_analysis = self.query_optimizer.analyze_query(query)
@@ -334,6 +485,12 @@ class HybridSearchEngine:
             response_time = time.time() - start_time
             self._update_avg_response_time(response_time)
             
+            if results:
+                # Cache private copies so callers filling in fields cannot alter later hits
+                self._result_cache[cache_key] = tuple(self._copy_results(results))
+                if len(self._result_cache) > self._result_cache_size:
+                    self._result_cache.popitem(last=False)
+            
             return results
             
         except Exception as e:
@@ -341,44 +498,79 @@ class HybridSearchEngine:
             # Fallback to basic search
             return self._semantic_search_only(query, top_k)
     
+    @staticmethod
+    def _copy_results(results) -> List[SearchResult]:
+        """Copy search results, including their metadata dicts."""
+        return [replace(result, metadata=dict(result.metadata)) for result in results]
+    
     def _hybrid_search(self, query_analysis: QueryAnalysis, top_k: int) -> List[SearchResult]:
         """Perform hybrid search with both semantic and keyword approaches."""
         try:
-            # Get semantic search results
-            semantic_results = self._get_semantic_results(query_analysis.cleaned_query, top_k * 2)
-            
-            # Get keyword search results
-            keyword_results = self._get_keyword_results(query_analysis.cleaned_query, top_k * 2)
+            # Run semantic and keyword retrieval in parallel; the keyword index
+            # is read-only after construction, so concurrent searches are safe
+            query = query_analysis.cleaned_query
+            semantic_future = self._pool.submit(self._get_semantic_results, query, top_k * 2)
+            keyword_future = self._pool.submit(self._get_keyword_results, query, top_k * 2)
+            semantic_results = semantic_future.result()
+            keyword_results = keyword_future.result()
             
             # Combine and rerank results
-            combined_results = self._combine_results(semantic_results, keyword_results, query_analysis)
+            contents, lower_contents, semantic_scores, keyword_scores = self._combine_results(
+                semantic_results, keyword_results, query_analysis
+            )
             
             # Apply reranking
-            reranked_results = self._rerank_results(combined_results, query_analysis)
-            
-            return reranked_results[:top_k]
+            return self._rerank_results(contents, lower_contents, semantic_scores, keyword_scores,
+                                        query_analysis, top_k)
             
         except Exception as e:
             logger.error(f"Error in hybrid search: {e}")
             return self._semantic_search_only(query_analysis.cleaned_query, top_k)
     
-    def _get_semantic_results(self, query: str, top_k: int) -> List[Tuple[Dict, float]]:
-        """Get results from semantic vector search."""
+    def _get_semantic_results(self, query: str, top_k: int) -> List[Tuple[int, str, float]]:
+        """Get (doc_id, content, score) results from semantic vector search."""
         try:
             if hasattr(self.vector_store, 'similarity_search_with_score'):
                 docs_and_scores = self.vector_store.similarity_search_with_score(query, k=top_k)
-                return [(doc.page_content, score) for doc, score in docs_and_scores]
+            elif hasattr(self.vector_store, 'search'):
+                # The repo's VectorStore: same result format and similarity scale as batch_search
+                return [(self._semantic_doc_id(result['metadata'], result['content']), result['content'],
+                         result['similarity'])
+                        for result in self.vector_store.search(query, n_results=top_k)]
             else:
                 # Fallback method
                 docs = self.vector_store.similarity_search(query, k=top_k)
-                return [(doc.page_content, 0.5) for doc in docs]  # Default score
+                docs_and_scores = [(doc, 0.5) for doc in docs]  # Default score
+            
+            return [(self._semantic_doc_id(getattr(doc, 'metadata', None), doc.page_content), doc.page_content, score)
+                    for doc, score in docs_and_scores]
                 
         except Exception as e:
             logger.error(f"Error in semantic search: {e}")
             return []
     
-    def _get_keyword_results(self, query: str, top_k: int) -> List[Tuple[str, float]]:
-        """Get results from keyword search."""
+    def _get_semantic_results_batch(self, queries: List[str], top_k: int) -> List[List[Tuple[int, str, float]]]:
+        """Get semantic results for several queries, embedding them in one batch when possible."""
+        if not hasattr(self.vector_store, 'batch_search'):
+            # Vector stores without batch search are queried one by one
+            return [self._get_semantic_results(query, top_k) for query in queries]
+        
+        # One encoder pass for all queries, then a single multi-query ANN lookup;
+        # the vector store handles embedding normalization and distance conversion
+        return [
+            [(self._semantic_doc_id(result['metadata'], result['content']), result['content'], result['similarity'])
+             for result in results]
+            for results in self.vector_store.batch_search(queries, n_results=top_k)
+        ]
+    
+    def _semantic_doc_id(self, metadata: Optional[Dict], content: str) -> int:
+        """Resolve a vector store document to its corpus index, or a content hash if unknown."""
+        metadata = metadata or {}
+        doc_id = self._doc_index.get((metadata.get('url', ''), metadata.get('chunk_id', 0)))
+        return doc_id if doc_id is not None else _content_id(content)
+    
+    def _get_keyword_results(self, query: str, top_k: int) -> List[Tuple[int, str, float]]:
+        """Get (doc_id, content, score) results from keyword search."""
         try:
             keyword_scores = self.keyword_engine.search(query, top_k)
             results = []
@@ -386,7 +578,7 @@ class HybridSearchEngine:
             for doc_idx, score in keyword_scores:
                 if doc_idx < len(self.documents):
                     content = self.documents[doc_idx].get('content', '')
-                    results.append((content, score))
+                    results.append((doc_idx, content, score))
             
             return results
             
@@ -395,121 +587,187 @@ class HybridSearchEngine:
             return []
     
     def _combine_results(self, semantic_results: List[Tuple], keyword_results: List[Tuple], 
-                        query_analysis: QueryAnalysis) -> List[SearchResult]:
-        """Combine semantic and keyword search results."""
-        combined = {}
+                        query_analysis: QueryAnalysis) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+        """
+        Combine semantic and keyword search results, merging hits on the same document id.
+        Returns parallel (contents, lowercased contents, semantic scores, keyword scores) columns.
+        """
+        positions = {}
+        contents = []
+        lower_contents = []
+        semantic_scores = []
+        keyword_scores = []
         
         # Process semantic results
-        for content, score in semantic_results:
-            content_hash = hash(content[:100])  # Use first 100 chars as identifier
-            if content_hash not in combined:
-                combined[content_hash] = SearchResult(
-                    content=content,
-                    source_url="",  # Will be filled from metadata
-                    relevance_score=0.0,
-                    keyword_score=0.0,
-                    semantic_score=score,
-                    combined_score=0.0,
-                    chunk_id="",
-                    metadata={}
-                )
+        for doc_id, content, score in semantic_results:
+            pos = positions.get(doc_id)
+            if pos is None:
+                positions[doc_id] = len(contents)
+                contents.append(content)
+                lower_contents.append(self._lower_content(doc_id, content))
+                semantic_scores.append(score)
+                keyword_scores.append(0.0)
             else:
-                combined[content_hash].semantic_score = max(combined[content_hash].semantic_score, score)
+                semantic_scores[pos] = max(semantic_scores[pos], score)
         
         # Process keyword results
-        for content, score in keyword_results:
-            content_hash = hash(content[:100])
-            if content_hash not in combined:
-                combined[content_hash] = SearchResult(
-                    content=content,
-                    source_url="",
-                    relevance_score=0.0,
-                    keyword_score=score,
-                    semantic_score=0.0,
-                    combined_score=0.0,
-                    chunk_id="",
-                    metadata={}
-                )
+        for doc_id, content, score in keyword_results:
+            pos = positions.get(doc_id)
+            if pos is None:
+                positions[doc_id] = len(contents)
+                contents.append(content)
+                lower_contents.append(self._lower_content(doc_id, content))
+                semantic_scores.append(0.0)
+                keyword_scores.append(score)
             else:
-                combined[content_hash].keyword_score = max(combined[content_hash].keyword_score, score)
-        
-        # Calculate combined scores
-        for result in combined.values():
-            result.combined_score = (
-                self.semantic_weight * result.semantic_score +
-                self.keyword_weight * result.keyword_score
-            )
-            result.relevance_score = result.combined_score
+                keyword_scores[pos] = max(keyword_scores[pos], score)
         
-        return list(combined.values())
+        return (contents, lower_contents,
+                np.asarray(semantic_scores, dtype=np.float64), np.asarray(keyword_scores, dtype=np.float64))
     
-    def _rerank_results(self, results: List[SearchResult], query_analysis: QueryAnalysis) -> List[SearchResult]:
-        """Apply reranking based on query analysis and content features."""
+    def _lower_content(self, doc_id: int, content: str) -> str:
+        """Lowercased content, cached for corpus text so each corpus document is lowercased once per engine."""
+        if not 0 <= doc_id < len(self.documents):
+            # Content-hash ids of documents outside the corpus are not cached
+            return content.lower()
+        corpus_content = self.documents[doc_id].get('content', '')
+        if content is not corpus_content and content != corpus_content:
+            # Semantic hits may carry different text for the same id (e.g. title + content)
+            return content.lower()
+        lowered = self._lower_contents.get(doc_id)
+        if lowered is None:
+            lowered = self._lower_contents[doc_id] = corpus_content.lower()
+        return lowered
+    
+    def _rerank_results(self, contents: List[str], lower_contents: List[str], semantic_scores: np.ndarray,
+                        keyword_scores: np.ndarray, query_analysis: QueryAnalysis, top_k: int) -> List[SearchResult]:
+        """Apply reranking based on query analysis and content features, keeping the top_k results."""
+        boosts = np.ones(len(contents), dtype=np.float64)
+        
         try:
-            for result in results:
-                # Apply query-specific boosting
-                boost_factor = 1.0
-                
-                # Boost results containing query keywords
-                content_lower = result.content.lower()
-                for keyword in query_analysis.keywords:
-                    if keyword.lower() in content_lower:
-                        boost_factor += 0.1
+            # Boost contributed by each query term found in a result; repeated
+            # keywords/entities count once per occurrence in the query
+            term_boosts = Counter()
+            for keyword in query_analysis.keywords:
+                term_boosts[keyword.lower()] += 0.1
+            for entity in query_analysis.entities:
+                term_boosts[entity.lower()] += 0.15
+            term_boosts.pop('', None)
+            type_terms = _QUERY_TYPE_TERMS.get(query_analysis.query_type, ())
+            
+            terms = set(term_boosts).union(type_terms)
+            matcher = self._build_term_matcher(terms)
+            
+            for i, content_lower in enumerate(lower_contents):
+                # Find every query term in the content with a single scan
+                found = self._find_terms(content_lower, terms, matcher)
                 
-                # Boost results containing entities
-                for entity in query_analysis.entities:
-                    if entity.lower() in content_lower:
-                        boost_factor += 0.15
+                # Apply query-specific boosting
+                boosts[i] += sum(term_boosts[term] for term in found if term in term_boosts)
                 
                 # Apply query type specific boosting
-                if query_analysis.query_type == 'definition' and 'define' in content_lower:
-                    boost_factor += 0.2
-                elif query_analysis.query_type == 'process' and any(word in content_lower for word in ['step', 'process', 'how']):
-                    boost_factor += 0.2
-                
-                # Apply boost
-                result.combined_score *= boost_factor
-                result.relevance_score = result.combined_score
+                if found.intersection(type_terms):
+                    boosts[i] += 0.2
+            
+        except Exception as e:
+            logger.error(f"Error in reranking: {e}")
+            boosts[:] = 1.0
+        
+        # Weighted score for all candidates at once, then boosted
+        combined_scores = self.semantic_weight * semantic_scores + self.keyword_weight * keyword_scores
+        combined_scores *= boosts
+        
+        # Only the selected results are materialized as SearchResult objects
+        return [
+            SearchResult(
+                content=contents[i],
+                source_url="",  # Will be filled from metadata
+                relevance_score=float(combined_scores[i]),
+                keyword_score=float(keyword_scores[i]),
+                semantic_score=float(semantic_scores[i]),
+                combined_score=float(combined_scores[i]),
+                chunk_id="",
+                metadata={}
+            )
+            for i in _top_k_indices(combined_scores, top_k)
+        ]
+    
+    def _build_term_matcher(self, terms: Set[str]):
+        """Build an Aho-Corasick automaton over the query terms, or None if unavailable."""
+        if not AHOCORASICK_AVAILABLE or not terms:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for term in terms:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+        return automaton
+    
+    def _find_terms(self, content_lower: str, terms: Set[str], matcher) -> Set[str]:
+        """Return the query terms occurring as substrings of the lowercased content."""
+        if matcher is not None:
+            return {term for _, term in matcher.iter(content_lower)}
+        return {term for term in terms if term in content_lower}
+    
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[SearchResult]]:
+        """
+        Semantic-only search for several queries at once (e.g. prefetching suggested prompts).
+        Queries are embedded in a single batch; returns one result list per query.
+        """
+        if not queries:
+            return []
+        
+        start_time = time.time()
+        self.search_stats['semantic_searches'] += len(queries)
+        
+        try:
+            batch = self._get_semantic_results_batch(queries, top_k)
+            results = [self._semantic_results_to_search_results(semantic_results)
+                       for semantic_results in batch]
+            
+            # Track performance, attributing an equal share of the batch time to each query
+            per_query_time = (time.time() - start_time) / len(queries)
+            for _ in queries:
+                self.search_stats['total_searches'] += 1
+                self._update_avg_response_time(per_query_time)
             
-            # Sort by final score
-            results.sort(key=lambda x: x.combined_score, reverse=True)
             return results
             
         except Exception as e:
-            logger.error(f"Error in reranking: {e}")
-            return sorted(results, key=lambda x: x.combined_score, reverse=True)
+            logger.error(f"Error in batch semantic search: {e}")
+            self.search_stats['total_searches'] += len(queries)
+            return [self._semantic_search_only(query, top_k) for query in queries]
     
     def _semantic_search_only(self, query: str, top_k: int) -> List[SearchResult]:
         """Fallback to semantic search only."""
         try:
             semantic_results = self._get_semantic_results(query, top_k)
-            
-            results = []
-            for content, score in semantic_results:
-                results.append(SearchResult(
-                    content=content,
-                    source_url="",
-                    relevance_score=score,
-                    keyword_score=0.0,
-                    semantic_score=score,
-                    combined_score=score,
-                    chunk_id="",
-                    metadata={}
-                ))
-            
-            return results
+            return self._semantic_results_to_search_results(semantic_results)
             
         except Exception as e:
             logger.error(f"Error in semantic search fallback: {e}")
             return []
     
+    def _semantic_results_to_search_results(self, semantic_results: List[Tuple[int, str, float]]) -> List[SearchResult]:
+        """Wrap (doc_id, content, score) semantic hits as SearchResult objects."""
+        return [
+            SearchResult(
+                content=content,
+                source_url="",
+                relevance_score=score,
+                keyword_score=0.0,
+                semantic_score=score,
+                combined_score=score,
+                chunk_id="",
+                metadata={}
+            )
+            for _, content, score in semantic_results
+        ]
+    
     def _update_avg_response_time(self, response_time: float):
-        """Update average response time statistics."""
-        current_avg = self.search_stats['avg_response_time']
-        total_searches = self.search_stats['total_searches']
-        
-        new_avg = ((current_avg * (total_searches - 1)) + response_time) / total_searches
-        self.search_stats['avg_response_time'] = new_avg
+        """Update average response time statistics with an incremental (Welford) mean."""
+        avg = self.search_stats['avg_response_time']
+        self.search_stats['avg_response_time'] = avg + (response_time - avg) / self.search_stats['total_searches']
     
     def get_performance_stats(self) -> Dict:
         """Get search engine performance statistics."""
@@ -520,5 +778,6 @@ class HybridSearchEngine:
         total = semantic_weight + keyword_weight
         self.semantic_weight = semantic_weight / total
         self.keyword_weight = keyword_weight / total
+        self._result_cache.clear()
         
         logger.info(f"Updated search weights: semantic={self.semantic_weight:.2f}, keyword={self.keyword_weight:.2f}")
@@ -9,11 +9,51 @@ import os
 import random
 from typing import Dict, List, Optional
 
+# Prefixes of malformed auto-generated feature questions
+_BAD_FEATURE_PREFIXES = (
+    'What is handle',
+    'What is Note',
+    'What is day',
+    'What is our legal',
+    'What is configure'
+)
+
+# Categories that feed the quick start list (top 2 prompts from each)
+_QUICK_START_CATEGORIES = (
+    'company_basics',
+    'values_and_culture',
+    'hiring_and_careers',
+    'development_and_engineering'
+)
+
+# Categories relevant to each user role
+_ROLE_CATEGORIES = {
+    'candidate': (
+        'hiring_and_careers',
+        'values_and_culture',
+        'company_basics'
+    ),
+    'developer': (
+        'development_and_engineering',
+        'specific_gitlab_features',
+        'processes_and_workflows'
+    ),
+    'manager': (
+        'management_and_leadership',
+        'processes_and_workflows',
+        'values_and_culture'
+    ),
+    'security': (
+        'security_and_compliance',
+        'development_and_engineering',
+        'processes_and_workflows'
+    )
+}
+
 class PromptManager:
     def __init__(self, data_driven_file: str = "data_driven_prompts_simplified.json"):
         self.data_driven_file = data_driven_file
         self.data_driven_prompts = {}
-        self.load_data_driven_prompts()
         
         # Fallback static prompts if data-driven ones aren't available
         self.static_prompts = {
@@ -48,6 +88,8 @@ class PromptManager:
                 "How does GitLab handle performance reviews?"
             ]
         }
+        
+        self.load_data_driven_prompts()
     
     def load_data_driven_prompts(self):
         """Load data-driven prompts from JSON file."""
@@ -61,12 +103,7 @@ class PromptManager:
                     cleaned_features = []
                     for prompt in self.data_driven_prompts['specific_gitlab_features']:
                         # Only keep well-formed questions
-                        if (len(prompt) < 100 and 
-                            not prompt.startswith('What is handle') and
-                            not prompt.startswith('What is Note') and
-                            not prompt.startswith('What is day') and
-                            not prompt.startswith('What is our legal') and
-                            not prompt.startswith('What is configure')):
+                        if len(prompt) < 100 and not prompt.startswith(_BAD_FEATURE_PREFIXES):
                             cleaned_features.append(prompt)
                     
                     # Add some better specific feature prompts
@@ -83,6 +120,28 @@ class PromptManager:
         except Exception as e:
             print(f"Warning: Could not load data-driven prompts: {e}")
             self.data_driven_prompts = {}
+        
+        self._build_prompt_views()
+    
+    def _build_prompt_views(self):
+        """Precompute the flattened prompt views; prompts only change when reloaded."""
+        prompts = self.get_prompts()
+        
+        self._all_prompts = tuple(p for category_prompts in prompts.values() for p in category_prompts)
+        self._lower_prompts = tuple((p.lower(), p) for p in self._all_prompts)
+        
+        quick_start = []
+        for category in _QUICK_START_CATEGORIES:
+            quick_start.extend(prompts.get(category, [])[:2])
+        self._quick_start = tuple(quick_start[:8])  # Limit to 8 total
+        
+        self._role_prompts = {
+            role: tuple(p for category in categories for p in prompts.get(category, []))[:10]
+            for role, categories in _ROLE_CATEGORIES.items()
+        }
+        
+        self._stats = {category: len(category_prompts) for category, category_prompts in prompts.items()}
+        self._stats['total'] = len(self._all_prompts)
     
     def get_prompts(self) -> Dict[str, List[str]]:
         """Get the best available prompts (data-driven if available, otherwise static)."""
@@ -97,37 +156,14 @@ class PromptManager:
     
     def get_quick_start_prompts(self) -> List[str]:
         """Get a curated list of quick start prompts."""
-        prompts = self.get_prompts()
-        
-        quick_start = []
-        
-        # Get top prompts from each major category
-        categories_for_quick_start = [
-            'company_basics',
-            'values_and_culture', 
-            'hiring_and_careers',
-            'development_and_engineering'
-        ]
-        
-        for category in categories_for_quick_start:
-            category_prompts = prompts.get(category, [])
-            if category_prompts:
-                quick_start.extend(category_prompts[:2])  # Top 2 from each
-        
-        return quick_start[:8]  # Limit to 8 total
+        return list(self._quick_start)
     
     def get_random_prompts(self, count: int = 6) -> List[str]:
         """Get random prompts from all categories."""
-        all_prompts = []
-        prompts = self.get_prompts()
-        
-        for category_prompts in prompts.values():
-            all_prompts.extend(category_prompts)
+        if len(self._all_prompts) <= count:
+            return list(self._all_prompts)
         
-        if len(all_prompts) <= count:
-            return all_prompts
-        
-        return random.sample(all_prompts, count)
+        return random.sample(self._all_prompts, count)
     
     def get_category_titles(self) -> Dict[str, str]:
         """Get user-friendly titles for categories."""
@@ -149,50 +185,11 @@ class PromptManager:
     def search_prompts(self, search_term: str) -> List[str]:
         """Search for prompts containing a specific term."""
         search_term = search_term.lower()
-        matching_prompts = []
-        prompts = self.get_prompts()
-        
-        for category_prompts in prompts.values():
-            for prompt in category_prompts:
-                if search_term in prompt.lower():
-                    matching_prompts.append(prompt)
-        
-        return matching_prompts
+        return [prompt for prompt_lower, prompt in self._lower_prompts if search_term in prompt_lower]
     
     def get_prompts_for_role(self, role: str) -> List[str]:
-        """Get prompts tailored for specific roles."""
-        prompts = self.get_prompts()
-        
-        role_mapping = {
-            'candidate': [
-                'hiring_and_careers',
-                'values_and_culture',
-                'company_basics'
-            ],
-            'developer': [
-                'development_and_engineering',
-                'specific_gitlab_features',
-                'processes_and_workflows'
-            ],
-            'manager': [
-                'management_and_leadership',
-                'processes_and_workflows',
-                'values_and_culture'
-            ],
-            'security': [
-                'security_and_compliance',
-                'development_and_engineering',
-                'processes_and_workflows'
-            ]
-        }
-        
-        relevant_categories = role_mapping.get(role.lower(), [])
-        role_prompts = []
-        
-        for category in relevant_categories:
-            role_prompts.extend(prompts.get(category, []))
-        
-        return role_prompts[:10]  # Limit to 10 prompts
+        """Get prompts tailored for specific roles (up to 10)."""
+        return list(self._role_prompts.get(role.lower(), ()))
     
     def is_data_driven(self) -> bool:
         """Check if we're using data-driven prompts."""
@@ -200,14 +197,4 @@ class PromptManager:
     
     def get_prompt_stats(self) -> Dict[str, int]:
         """Get statistics about available prompts."""
-        prompts = self.get_prompts()
-        stats = {}
-        
-        total = 0
-        for category, category_prompts in prompts.items():
-            count = len(category_prompts)
-            stats[category] = count
-            total += count
-        
-        stats['total'] = total
-        return stats
+        return dict(self._stats)
\ No newline at end of file
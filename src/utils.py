@@ -5,20 +5,50 @@ Utility functions for the GitLab chatbot application.
 import os
 import json
 import logging
+import math
 import time
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from collections import Counter
 from datetime import datetime
 import hashlib
 import re
 from urllib.parse import urlparse
+import numpy as np
+
+# Try to import orjson for fast JSON encoding/decoding
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import xxhash for fast non-cryptographic file hashing
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Text processing patterns compiled once at import time
+_WORD_RE = re.compile(r'\b[a-zA-Z]{4,}\b')
+_SENT_RE = re.compile(r'[.!?]+')
+
+# Common words ignored by keyword extraction
+_STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had',
+    'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his',
+    'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy',
+    'did', 'let', 'put', 'say', 'she', 'too', 'use'
+})
+
 class Config:
     """Configuration management for the application."""
     
     def __init__(self, config_file: str = "config.json"):
         self.config_file = config_file
+        self._keys_cache: Dict[str, Tuple[str, ...]] = {}
         self.config = self.load_config()
     
     def load_config(self) -> Dict[str, Any]:
@@ -49,8 +79,7 @@ class Config:
         
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r') as f:
-                    loaded_config = json.load(f)
+                loaded_config = FileManager.load_json(self.config_file)
                 # Merge with defaults
                 default_config.update(loaded_config)
             except Exception as e:
@@ -61,14 +90,25 @@ class Config:
     def save_config(self):
         """Save current configuration to file."""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            FileManager.save_json(self.config, self.config_file)
         except Exception as e:
             logger.error(f"Error saving config: {e}")
     
+    def _split_key(self, key_path: str) -> Tuple[str, ...]:
+        """Split a dot-notation path once and reuse the interned tuple."""
+        keys = self._keys_cache.get(key_path)
+        if keys is None:
+            keys = self._keys_cache[key_path] = tuple(key_path.split('.'))
+        return keys
+    
     def get(self, key_path: str, default=None):
         """Get configuration value using dot notation (e.g., 'app.title')."""
-        keys = key_path.split('.')
+        return self.get_tuple(self._split_key(key_path), default)
+    
+    def get_tuple(self, keys: Tuple[str, ...], default=None):
+        """Get configuration value from a pre-split key path (e.g., ('app', 'title'))."""
+        # Values are not cached: get() returns live nested dicts and self.config is
+        # public, so either can be changed in place without going through set()
         value = self.config
         for key in keys:
             if isinstance(value, dict) and key in value:
@@ -79,7 +119,7 @@ class Config:
     
     def set(self, key_path: str, value):
         """Set configuration value using dot notation."""
-        keys = key_path.split('.')
+        keys = self._split_key(key_path)
         config = self.config
         for key in keys[:-1]:
             if key not in config:
@@ -93,36 +133,20 @@ class TextProcessor:
     @staticmethod
     def clean_text(text: str) -> str:
         """Clean and normalize text."""
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        # Remove extra newlines
-        text = re.sub(r'\n\s*\n+', '\n\n', text)
-        # Strip leading/trailing whitespace
-        text = text.strip()
-        return text
+        # Collapse whitespace runs and strip the ends; split()/join() does
+        # this in C and treats the same characters as whitespace as \s
+        return ' '.join(text.split())
     
     @staticmethod
     def extract_keywords(text: str, max_keywords: int = 10) -> List[str]:
         """Extract keywords from text."""
         # Simple keyword extraction (can be improved with NLP libraries)
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
+        words = _WORD_RE.findall(text.lower())
         # Filter common words
-        stop_words = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had',
-            'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his',
-            'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy',
-            'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use'
-        }
-        keywords = [word for word in words if word not in stop_words and len(word) > 3]
-        
-        # Count frequency
-        keyword_counts = {}
-        for keyword in keywords:
-            keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
+        keywords = (word for word in words if word not in _STOP_WORDS)
         
-        # Sort by frequency and return top keywords
-        sorted_keywords = sorted(keyword_counts.items(), key=lambda x: x[1], reverse=True)
-        return [keyword for keyword, count in sorted_keywords[:max_keywords]]
+        # Return the most frequent keywords
+        return [keyword for keyword, count in Counter(keywords).most_common(max_keywords)]
     
     @staticmethod
     def truncate_text(text: str, max_length: int = 500, suffix: str = "...") -> str:
@@ -135,7 +159,7 @@ class TextProcessor:
     def split_into_sentences(text: str) -> List[str]:
         """Split text into sentences."""
         # Simple sentence splitting (can be improved with NLP libraries)
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_RE.split(text)
         return [sentence.strip() for sentence in sentences if sentence.strip()]
 
 class URLValidator:
@@ -154,10 +178,11 @@ class URLValidator:
     def is_gitlab_url(url: str) -> bool:
         """Check if URL is from GitLab domain."""
         try:
-            parsed = urlparse(url)
-            return 'gitlab.com' in parsed.netloc.lower()
-        except:
+            # hostname is already lower-cased and excludes userinfo and port
+            host = urlparse(url).hostname or ''
+        except ValueError:
             return False
+        return host == 'gitlab.com' or host.endswith('.gitlab.com')
     
     @staticmethod
     def normalize_url(url: str) -> str:
@@ -178,11 +203,29 @@ class FileManager:
     
     @staticmethod
     def save_json(data: Any, filepath: str, indent: int = 2):
-        """Save data as JSON file."""
+        """
+        Save data as JSON file.
+        
+        Uses orjson when available. orjson writes NaN and Infinity as null,
+        where the json module writes the non-standard NaN/Infinity literals.
+        """
         directory = os.path.dirname(filepath)
         if directory:
             FileManager.ensure_directory(directory)
         
+        # orjson supports compact or 2-space output; other indents use the json module
+        if ORJSON_AVAILABLE and indent in (None, 0, 2):
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            try:
+                encoded = orjson.dumps(data, option=option)
+            except orjson.JSONEncodeError:
+                # e.g. integers wider than 64 bits; the json module handles these
+                encoded = None
+            if encoded is not None:
+                with open(filepath, 'wb') as f:
+                    f.write(encoded)
+                return
+        
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=indent, ensure_ascii=False)
     
@@ -192,17 +235,29 @@ class FileManager:
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"File not found: {filepath}")
         
+        if ORJSON_AVAILABLE:
+            with open(filepath, 'rb') as f:
+                raw = f.read()
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                # orjson rejects the NaN/Infinity literals the json module writes
+                return json.loads(raw)
+        
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     
     @staticmethod
     def get_file_hash(filepath: str) -> str:
-        """Get MD5 hash of file."""
-        hash_md5 = hashlib.md5()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """Get a content hash of a file for change detection (xxh3-64, or BLAKE2b without xxhash)."""
+        file_hash = xxhash.xxh3_64() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)
+        # Read 1 MiB at a time into one reusable buffer
+        buffer = bytearray(1 << 20)
+        view = memoryview(buffer)
+        with open(filepath, "rb", buffering=0) as f:
+            while n := f.readinto(buffer):
+                file_hash.update(view[:n])
+        return file_hash.hexdigest()
 
 class Timer:
     """Simple timer utility."""
@@ -213,19 +268,19 @@ class Timer:
     
     def start(self):
         """Start the timer."""
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         return self
     
     def stop(self):
         """Stop the timer."""
-        self.end_time = time.time()
+        self.end_time = time.perf_counter()
         return self
     
     def elapsed(self) -> float:
         """Get elapsed time in seconds."""
         if self.start_time is None:
             return 0.0
-        end = self.end_time if self.end_time else time.time()
+        end = self.end_time if self.end_time is not None else time.perf_counter()
         return end - self.start_time
     
     def __enter__(self):
@@ -237,48 +292,63 @@ class Timer:
 class PerformanceMonitor:
     """Monitor application performance."""
     
-    def __init__(self):
-        self.metrics = {}
+    def __init__(self, capacity: int = 1024):
+        # Per metric: (values ring buffer, timestamp ns ring buffer, total records)
+        self.capacity = capacity
+        self.metrics: Dict[str, Tuple[np.ndarray, np.ndarray, int]] = {}
     
     def record_metric(self, name: str, value: float, timestamp: Optional[datetime] = None):
-        """Record a performance metric."""
-        if timestamp is None:
-            timestamp = datetime.now()
+        """Record a performance metric, keeping the most recent `capacity` values."""
+        if value is None:
+            # The float buffer would store None as NaN and poison every average
+            raise TypeError(f"Metric value for '{name}' must be a number, not None")
+        timestamp_ns = time.time_ns() if timestamp is None else int(timestamp.timestamp() * 1e9)
         
         if name not in self.metrics:
-            self.metrics[name] = []
+            self.metrics[name] = (np.empty(self.capacity, dtype=np.float64),
+                                  np.empty(self.capacity, dtype=np.int64), 0)
         
-        self.metrics[name].append({
-            'value': value,
-            'timestamp': timestamp.isoformat()
-        })
+        values, timestamps, count = self.metrics[name]
+        slot = count % self.capacity
+        values[slot] = value
+        timestamps[slot] = timestamp_ns
+        self.metrics[name] = (values, timestamps, count + 1)
+    
+    def _recent_values(self, name: str, last_n: Optional[int] = None) -> np.ndarray:
+        """Retained values for a metric in recording order, optionally only the last n."""
+        values, _, count = self.metrics[name]
+        n = min(count, self.capacity)
+        if last_n:
+            n = min(n, last_n)
+        end = count % self.capacity
+        if n <= end:
+            return values[end - n:end]
+        # The window wraps around the end of the ring buffer
+        return np.concatenate((values[end - n:], values[:end]))
     
     def get_average(self, name: str, last_n: Optional[int] = None) -> float:
         """Get average value for a metric."""
         if name not in self.metrics:
             return 0.0
         
-        values = self.metrics[name]
-        if last_n:
-            values = values[-last_n:]
-        
-        if not values:
+        values = self._recent_values(name, last_n)
+        if not values.size:
             return 0.0
         
-        return sum(item['value'] for item in values) / len(values)
+        return float(values.mean())
     
     def get_summary(self) -> Dict[str, Dict[str, float]]:
         """Get summary statistics for all metrics."""
         summary = {}
-        for name, values in self.metrics.items():
-            if values:
-                value_list = [item['value'] for item in values]
+        for name in self.metrics:
+            values = self._recent_values(name)
+            if values.size:
                 summary[name] = {
-                    'count': len(value_list),
-                    'average': sum(value_list) / len(value_list),
-                    'min': min(value_list),
-                    'max': max(value_list),
-                    'latest': value_list[-1]
+                    'count': int(values.size),
+                    'average': float(values.mean()),
+                    'min': float(values.min()),
+                    'max': float(values.max()),
+                    'latest': float(values[-1])
                 }
         return summary
 
@@ -303,12 +373,14 @@ def format_file_size(size_bytes: int) -> str:
         return "0B"
     
     size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024
-        i += 1
+    if not math.isfinite(size_bytes):
+        # inf/nan have no bit length; +inf goes to the largest unit, -inf and nan stay in bytes
+        i = len(size_names) - 1 if size_bytes > 0 else 0
+    else:
+        # Each unit is 10 more bits, so the bit length picks the unit directly
+        i = 0 if size_bytes < 1024 else min((int(size_bytes).bit_length() - 1) // 10, len(size_names) - 1)
     
-    return f"{size_bytes:.1f}{size_names[i]}"
+    return f"{size_bytes / (1 << (i * 10)):.1f}{size_names[i]}"
 
 def format_duration(seconds: float) -> str:
     """Format duration in human readable format."""
@@ -12,34 +12,174 @@ except ImportError:
 
 import os
 import json
+import hashlib
 import numpy as np
-from typing import List, Dict, Optional, Tuple
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from itertools import islice
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Tuple, Union
 import logging
 
+# chromadb and sentence_transformers are imported where first needed, so
+# importing this module stays cheap until a VectorStore is constructed
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Try to import orjson for fast loading of large data files
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import ijson for streaming large data files without loading them whole
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Try to import xxhash for fast, process-stable document ids
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Embedding backend used when none is passed to VectorStore: "torch" or "onnx"
+DEFAULT_EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+class OnnxEmbeddingModel:
+    """
+    Sentence embedding model running an ONNX export under ONNX Runtime.
+    
+    Mirrors the subset of SentenceTransformer.encode used by this module
+    (tokenize, run the transformer, mean-pool over the attention mask), so
+    it can stand in for the PyTorch model. The default export is the int8
+    dynamically quantized model published with sentence-transformers.
+    """
+    
+    def __init__(self, model_name: str, onnx_file: str = "onnx/model_quint8_avx2.onnx", max_length: int = 256):
+        """
+        Load the tokenizer and ONNX Runtime session.
+        
+        Args:
+            model_name: Local directory with an export, or a Hugging Face model id
+            onnx_file: Path of the ONNX graph inside the model directory or repo
+            max_length: Maximum number of tokens per text (MiniLM's sentence-transformers default)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        self.tokenizer = Tokenizer.from_file(self._resolve_file(model_name, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self._resolve_file(model_name, onnx_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self._input_names = {graph_input.name for graph_input in self.session.get_inputs()}
+    
+    @staticmethod
+    def _resolve_file(model_name: str, filename: str) -> str:
+        """Locate a model file in a local directory, downloading it from the Hugging Face Hub otherwise."""
+        if os.path.isdir(model_name):
+            return os.path.join(model_name, filename)
+        from huggingface_hub import hf_hub_download
+        repo_id = model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+        return hf_hub_download(repo_id, filename)
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False) -> np.ndarray:
+        """Embed texts; accepts the SentenceTransformer.encode arguments used in this module."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        
+        embeddings = None
+        # Batch texts of similar length together to minimise padding
+        order = np.argsort([-len(sentence) for sentence in sentences], kind='stable')
+        for start in range(0, len(sentences), batch_size):
+            batch_idx = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([sentences[i] for i in batch_idx])
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+                'attention_mask': attention_mask
+            }
+            if 'token_type_ids' in self._input_names:
+                feeds['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, feeds)[0]
+            
+            # Mean pooling over real (non-padding) tokens
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            
+            if embeddings is None:
+                embeddings = np.empty((len(sentences), pooled.shape[1]), dtype=np.float32)
+            embeddings[batch_idx] = pooled
+        
+        if embeddings is None:
+            return np.empty((0, 0), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+# Embedding models shared by all VectorStore instances, keyed by (model name, backend)
+_MODEL_CACHE: Dict[Tuple[str, str], Union["SentenceTransformer", OnnxEmbeddingModel]] = {}
+
+def _get_embedding_model(model_name: str, backend: str = "torch") -> Union["SentenceTransformer", OnnxEmbeddingModel]:
+    """Load an embedding model once per process and reuse it afterwards."""
+    model = _MODEL_CACHE.get((model_name, backend))
+    if model is None:
+        if backend == "onnx":
+            try:
+                logger.info(f"Loading ONNX embedding model: {model_name}")
+                model = OnnxEmbeddingModel(model_name)
+            except Exception as e:
+                logger.warning(f"ONNX embedding model unavailable ({e}), falling back to sentence-transformers")
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Loading embedding model: {model_name}")
+            model = SentenceTransformer(model_name)
+        _MODEL_CACHE[(model_name, backend)] = model
+    return model
+
+def _document_id(doc: Dict) -> str:
+    """Stable id for a chunk, so re-ingesting the same chunk maps to the same id in every process."""
+    key = f"{doc['url']}|{doc.get('chunk_id', 0)}".encode('utf-8')
+    if XXHASH_AVAILABLE:
+        return f"doc_{xxhash.xxh3_64_hexdigest(key)}"
+    return f"doc_{hashlib.blake2b(key, digest_size=8).hexdigest()}"
+
+# Number of documents embedded and inserted per ChromaDB add call
+DEFAULT_BATCH_SIZE = 256
+
 class VectorStore:
     """Vector store for document embeddings and similarity search."""
     
-    def __init__(self, persist_directory: str = "data/chroma_db", model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, persist_directory: str = "data/chroma_db", model_name: str = "all-MiniLM-L6-v2",
+                 embedding_backend: Optional[str] = None):
         """
         Initialize the vector store.
         
         Args:
             persist_directory: Directory to persist the vector database
             model_name: Name of the sentence transformer model
+            embedding_backend: "torch" or "onnx"; defaults to the EMBEDDING_BACKEND environment variable
         """
         self.persist_directory = persist_directory
         self.model_name = model_name
+        self.embedding_backend = embedding_backend or DEFAULT_EMBEDDING_BACKEND
         
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        # Initialize embedding model (shared across instances)
+        self.embedding_model = _get_embedding_model(model_name, self.embedding_backend)
         
         # Initialize ChromaDB
+        import chromadb
+        from chromadb.config import Settings
         os.makedirs(persist_directory, exist_ok=True)
         self.client = chromadb.Client(
             Settings(
@@ -54,24 +194,35 @@ class VectorStore:
             self.collection = self.client.get_collection(self.collection_name)
             logger.info(f"Loaded existing collection: {self.collection_name}")
         except:
+            # Embeddings are unit-normalized, so inner product equals cosine similarity
             self.collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"description": "GitLab Handbook and Direction documents"}
+                metadata={
+                    "description": "GitLab Handbook and Direction documents",
+                    "hnsw:space": "ip"
+                }
             )
             logger.info(f"Created new collection: {self.collection_name}")
+        
+        # Collections created before the switch to inner product still use L2
+        self.distance_space = (getattr(self.collection, 'metadata', None) or {}).get("hnsw:space", "l2")
+        
+        # Bumped on every write so caches of search results can tell they are stale
+        self.generation = 0
     
     def create_embeddings(self, texts: List[str]) -> np.ndarray:
         """Create embeddings for a list of texts."""
         logger.info(f"Creating embeddings for {len(texts)} texts")
-        embeddings = self.embedding_model.encode(texts, show_progress_bar=True)
+        embeddings = self.embedding_model.encode(texts, show_progress_bar=True, normalize_embeddings=True)
         return embeddings
     
-    def add_documents(self, documents: List[Dict]) -> None:
+    def add_documents(self, documents: List[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
         """
         Add documents to the vector store.
         
         Args:
             documents: List of document dictionaries
+            batch_size: Number of documents embedded and inserted at a time
         """
         if not documents:
             logger.warning("No documents to add")
@@ -79,17 +230,48 @@ class VectorStore:
         
         logger.info(f"Adding {len(documents)} documents to vector store")
         
+        added = 0
+        for start in range(0, len(documents), batch_size):
+            added += self.add_document_batch(documents[start:start + batch_size])
+        
+        logger.info(f"✅ Successfully added or updated {added} documents in vector store")
+    
+    def add_document_batch(self, documents: List[Dict]) -> int:
+        """
+        Embed one batch of documents and add it to the collection.
+        
+        Ids are derived from url and chunk_id. Chunks already stored with the
+        same text are skipped; chunks whose text changed are re-embedded and
+        updated in place. Chunks that disappeared from a source are not
+        removed (use delete_collection to rebuild from scratch).
+        
+        Args:
+            documents: List of document dictionaries
+            
+        Returns:
+            Number of documents added or updated
+        """
+        # Keep the first occurrence of each id within the batch
+        batch = {}
+        for doc in documents:
+            batch.setdefault(_document_id(doc), doc)
+        
+        stored = {}
+        if batch:
+            existing = self.collection.get(ids=list(batch), include=["documents"])
+            stored = dict(zip(existing['ids'], existing['documents']))
+        
         # Prepare data for ChromaDB
         ids = []
         texts = []
         metadatas = []
         
-        for i, doc in enumerate(documents):
-            doc_id = f"doc_{i}_{hash(doc['url'] + str(doc.get('chunk_id', 0)))}"
-            ids.append(doc_id)
-            
+        for doc_id, doc in batch.items():
             # Create searchable text (title + content)
             searchable_text = f"{doc['title']}\n\n{doc['content']}"
+            if stored.get(doc_id) == searchable_text:
+                continue
+            ids.append(doc_id)
             texts.append(searchable_text)
             
             # Prepare metadata
@@ -103,18 +285,28 @@ class VectorStore:
             }
             metadatas.append(metadata)
         
+        if not ids:
+            return 0
+        
         # Create embeddings
-        embeddings = self.create_embeddings(texts)
-        
-        # Add to ChromaDB
-        self.collection.add(
-            embeddings=embeddings.tolist(),
-            documents=texts,
-            metadatas=metadatas,
-            ids=ids
-        )
+        embeddings = self.create_embeddings(texts).tolist()
+        
+        # Add new chunks and overwrite changed ones in ChromaDB
+        new_rows = [i for i, doc_id in enumerate(ids) if doc_id not in stored]
+        changed_rows = [i for i, doc_id in enumerate(ids) if doc_id in stored]
+        for method, rows in (('add', new_rows), ('update', changed_rows)):
+            if rows:
+                getattr(self.collection, method)(
+                    embeddings=[embeddings[i] for i in rows],
+                    documents=[texts[i] for i in rows],
+                    metadatas=[metadatas[i] for i in rows],
+                    ids=[ids[i] for i in rows]
+                )
+        self.generation += 1
         
-        logger.info(f"✅ Successfully added {len(documents)} documents to vector store")
+        if changed_rows:
+            logger.info(f"Updated {len(changed_rows)} changed documents")
+        return len(ids)
     
     def search(self, query: str, n_results: int = 5, filter_dict: Optional[Dict] = None) -> List[Dict]:
         """
@@ -131,7 +323,7 @@ class VectorStore:
         logger.info(f"Searching for: '{query}'")
         
         # Create query embedding
-        query_embedding = self.embedding_model.encode([query])[0]
+        query_embedding = self.embedding_model.encode([query], normalize_embeddings=True)[0]
         
         # Search in ChromaDB
         results = self.collection.query(
@@ -140,22 +332,65 @@ class VectorStore:
             where=filter_dict
         )
         
-        # Format results
+        formatted_results = self._format_results(results, 0)
+        
+        logger.info(f"Found {len(formatted_results)} relevant documents")
+        return formatted_results
+    
+    def batch_search(self, queries: List[str], n_results: int = 5, filter_dict: Optional[Dict] = None) -> List[List[Dict]]:
+        """
+        Search for several queries with one embedding pass and one ChromaDB query.
+        
+        Args:
+            queries: Search queries
+            n_results: Number of results to return per query
+            filter_dict: Optional metadata filter
+            
+        Returns:
+            One list of relevant documents (same format as search) per query
+        """
+        if not queries:
+            return []
+        
+        logger.info(f"Batch searching {len(queries)} queries")
+        
+        # Create all query embeddings in a single batch
+        query_embeddings = self.embedding_model.encode(queries, batch_size=len(queries), convert_to_numpy=True,
+                                                       normalize_embeddings=True)
+        
+        # Search in ChromaDB
+        results = self.collection.query(
+            query_embeddings=query_embeddings.tolist(),
+            n_results=n_results,
+            where=filter_dict
+        )
+        
+        return [self._format_results(results, row) for row in range(len(queries))]
+    
+    def _format_results(self, results: Dict, row: int) -> List[Dict]:
+        """Format one query's row of a ChromaDB query response."""
         formatted_results = []
-        if results['ids'] and results['ids'][0]:
-            for i in range(len(results['ids'][0])):
+        if results['ids'] and len(results['ids']) > row and results['ids'][row]:
+            for i in range(len(results['ids'][row])):
+                distance = results['distances'][row][i] if 'distances' in results else 0.0
                 result = {
-                    'id': results['ids'][0][i],
-                    'content': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i],
-                    'distance': results['distances'][0][i] if 'distances' in results else 0.0,
-                    'similarity': 1 - (results['distances'][0][i] if 'distances' in results else 0.0)
+                    'id': results['ids'][row][i],
+                    'content': results['documents'][row][i],
+                    'metadata': results['metadatas'][row][i],
+                    'distance': distance,
+                    'similarity': self._similarity(distance)
                 }
                 formatted_results.append(result)
-        
-        logger.info(f"Found {len(formatted_results)} relevant documents")
         return formatted_results
     
+    def _similarity(self, distance: float) -> float:
+        """Convert a ChromaDB distance between unit vectors to cosine similarity."""
+        if self.distance_space == "l2":
+            # Chroma reports squared L2, which is 2 - 2*cos for unit vectors
+            return 1 - distance / 2
+        # 'ip' and 'cosine' distances are 1 - cos
+        return 1 - distance
+    
     def get_collection_info(self) -> Dict:
         """Get information about the collection."""
         count = self.collection.count()
@@ -170,6 +405,7 @@ class VectorStore:
         """Delete the collection (useful for reindexing)."""
         try:
             self.client.delete_collection(self.collection_name)
+            self.generation += 1
             logger.info(f"Deleted collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Error deleting collection: {e}")
@@ -177,8 +413,13 @@ class VectorStore:
 class AdvancedRetriever:
     """Advanced retrieval with query enhancement and reranking."""
     
-    def __init__(self, vector_store: VectorStore):
+    def __init__(self, vector_store: VectorStore, cache_size: int = 256):
         self.vector_store = vector_store
+        
+        # Bounded LRU of search results keyed by (query, n_results), valid for one store generation
+        self._search_cache: OrderedDict = OrderedDict()
+        self._search_cache_size = cache_size
+        self._search_cache_generation = getattr(vector_store, 'generation', 0)
     
     def enhance_query(self, query: str) -> List[str]:
         """Generate variations of the query for better retrieval."""
@@ -212,7 +453,8 @@ class AdvancedRetriever:
             ]
         
         enhanced_queries.extend(gitlab_contexts)
-        return enhanced_queries[:6]  # Increased to 6 variations
+        # Drop duplicate variations (e.g. when stripping 'what is' leaves the base query)
+        return list(dict.fromkeys(enhanced_queries))[:6]  # Increased to 6 variations
     
     def retrieve_with_reranking(self, query: str, n_results: int = 10, final_results: int = 5) -> List[Dict]:
         """
@@ -229,39 +471,95 @@ class AdvancedRetriever:
         # Get enhanced queries
         enhanced_queries = self.enhance_query(query)
         
-        # Retrieve results for each query variation
+        # Retrieve results for all query variations in one batch
         all_results = {}
-        for enhanced_query in enhanced_queries:
-            results = self.vector_store.search(enhanced_query, n_results=n_results)
+        for results in self._cached_batch_search(enhanced_queries, n_results):
             for result in results:
                 doc_id = result['id']
                 if doc_id not in all_results:
-                    all_results[doc_id] = result
+                    # Copy (metadata included) so cached search results are never mutated
+                    all_results[doc_id] = dict(result, metadata=dict(result['metadata']))
                     all_results[doc_id]['scores'] = []
                 all_results[doc_id]['scores'].append(result['similarity'])
         
-        # Rerank by average similarity score
-        for doc_id in all_results:
-            scores = all_results[doc_id]['scores']
-            all_results[doc_id]['avg_similarity'] = np.mean(scores)
-            all_results[doc_id]['max_similarity'] = np.max(scores)
-        
-        # Sort by average similarity
-        sorted_results = sorted(
-            all_results.values(),
-            key=lambda x: x['avg_similarity'],
-            reverse=True
+        if not all_results:
+            return []
+        
+        # Flatten every document's scores into one array and reduce per document segment
+        ranked = list(all_results.values())
+        counts = np.fromiter((len(result['scores']) for result in ranked), dtype=np.int64, count=len(ranked))
+        scores = np.fromiter(
+            (score for result in ranked for score in result['scores']),
+            dtype=np.float64,
+            count=int(counts.sum())
         )
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        avg_similarity = np.add.reduceat(scores, starts) / counts
+        max_similarity = np.maximum.reduceat(scores, starts)
         
-        return sorted_results[:final_results]
+        # Rerank by average similarity score
+        top_results = []
+        for i in np.argsort(-avg_similarity, kind='stable')[:final_results]:
+            result = ranked[i]
+            result['avg_similarity'] = float(avg_similarity[i])
+            result['max_similarity'] = float(max_similarity[i])
+            top_results.append(result)
+        
+        return top_results
+    
+    def _cached_batch_search(self, queries: List[str], n_results: int) -> List[List[Dict]]:
+        """Batch search that serves repeated (query, n_results) pairs from the LRU cache."""
+        # Drop cached results once the store has been written to since they were fetched
+        generation = getattr(self.vector_store, 'generation', 0)
+        if generation != self._search_cache_generation:
+            self._search_cache.clear()
+            self._search_cache_generation = generation
+        
+        missing = [query for query in queries if (query, n_results) not in self._search_cache]
+        if missing:
+            for query, results in zip(missing, self.vector_store.batch_search(missing, n_results=n_results)):
+                self._search_cache[(query, n_results)] = results
+        
+        batch = []
+        for query in queries:
+            key = (query, n_results)
+            self._search_cache.move_to_end(key)
+            batch.append(self._search_cache[key])
+        
+        # Evict least recently used entries only after the current batch has been read
+        while len(self._search_cache) > self._search_cache_size:
+            self._search_cache.popitem(last=False)
+        
+        return batch
 
-def build_vector_store_from_data(data_file: str = "data/chunks.json", persist_directory: str = "data/chroma_db") -> VectorStore:
+def _iter_documents(data_file: str) -> Iterator[Dict]:
+    """Yield documents from a chunks JSON file, streaming it when ijson is available."""
+    if IJSON_AVAILABLE:
+        with open(data_file, 'rb') as f:
+            # use_float yields floats instead of Decimal, which ChromaDB metadata rejects
+            yield from ijson.items(f, 'item', use_float=True)
+    elif ORJSON_AVAILABLE:
+        with open(data_file, 'rb') as f:
+            raw = f.read()
+        try:
+            documents = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson rejects the NaN/Infinity literals the json module writes
+            documents = json.loads(raw)
+        yield from documents
+    else:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+def build_vector_store_from_data(data_file: str = "data/chunks.json", persist_directory: str = "data/chroma_db",
+                                 batch_size: int = DEFAULT_BATCH_SIZE) -> VectorStore:
     """
     Build vector store from processed data file.
     
     Args:
         data_file: Path to the chunks JSON file
         persist_directory: Directory to persist the vector database
+        batch_size: Number of documents embedded and inserted at a time
         
     Returns:
         Initialized VectorStore with documents
@@ -272,17 +570,25 @@ def build_vector_store_from_data(data_file: str = "data/chunks.json", persist_di
     if not os.path.exists(data_file):
         raise FileNotFoundError(f"Data file not found: {data_file}")
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        documents = json.load(f)
-    
     # Initialize vector store
     vector_store = VectorStore(persist_directory=persist_directory)
     
     # Check if collection is empty
     collection_info = vector_store.get_collection_info()
     if collection_info['document_count'] == 0:
-        # Add documents to vector store
-        vector_store.add_documents(documents)
+        # Stream documents into the vector store one batch at a time
+        documents = _iter_documents(data_file)
+        added = 0
+        while True:
+            batch = list(islice(documents, batch_size))
+            if not batch:
+                break
+            added += vector_store.add_document_batch(batch)
+        
+        if added:
+            logger.info(f"✅ Successfully added {added} documents to vector store")
+        else:
+            logger.warning("No documents to add")
     else:
         logger.info(f"Collection already contains {collection_info['document_count']} documents")
     
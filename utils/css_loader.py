@@ -1,9 +1,17 @@
 """CSS loader utility for Streamlit applications."""
 
+import functools
 import streamlit as st
 from pathlib import Path
 
 
+@functools.lru_cache(maxsize=32)
+def _read_css(css_path: str, mtime: float) -> str:
+    """Read a CSS file; cached per (path, mtime) so edits are picked up on the next rerun."""
+    with open(css_path, 'r') as f:
+        return f.read()
+
+
 def load_css(css_file_path: str) -> None:
     """
     Load CSS from an external file and inject it into the Streamlit app.
@@ -14,8 +22,7 @@ def load_css(css_file_path: str) -> None:
     try:
         css_path = Path(css_file_path)
         if css_path.exists():
-            with open(css_path, 'r') as f:
-                css_content = f.read()
+            css_content = _read_css(str(css_path), css_path.stat().st_mtime)
             
             st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
         else: